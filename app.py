@@ -2,6 +2,7 @@ import customtkinter as ctk
 import tkinter as tk  # Pour tk.Label, etc.
 from tkinter import filedialog, messagebox
 import threading
+import queue
 import json
 import pandas as pd
 import os
@@ -10,17 +11,21 @@ import random
 import time
 from docx import Document
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageTk, ImageSequence  # Pour gérer les images et GIF animés
 
 # Import de vos scripts (inchangé)
-from main import scrape_urls, save_to_excel
-from optimize_cart import full_best_price, optimize_cart
+from main import scrape_urls, save_to_excel, prioritize_urls, load_history, update_history
+from optimize_cart import IncrementalOptimizer
+from seller_profiles import SellerProfileCache
 
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s [%(levelname)s] %(message)s"
 )
 
+SELLER_PREFETCH_WORKERS = 2  # Navigateurs dédiés aux pages vendeurs pendant le scraping
+
 class ScrapOptimizerApp:
     def __init__(self, root):
         # ----- Configuration de customtkinter -----
@@ -41,6 +46,7 @@ class ScrapOptimizerApp:
         self.file_path = ""
         self.search_filter = ""  # Filtre de recherche à appliquer (contenant le '?')
         self.filter_overlay = None  # Overlay pour la saisie du filtre
+        self.seller_cache = SellerProfileCache()  # Profils vendeurs (frais de port), partagé entre les runs
 
         # Création de l'interface graphique principale
         self.create_widgets()
@@ -342,19 +348,35 @@ class ScrapOptimizerApp:
         self.update_progress(0)
         threading.Thread(target=self.scrape_task).start()
 
-    def scrape_task(self):
+    def scrape_task(self, on_card=None):
+        """
+        Scrape les URLs, les cartes les plus coûteuses du scraping précédent en premier
+        (historique : données en mémoire, sinon scrape_history.json des lancements précédents).
+        - on_card : callback optionnel appelé avec chaque carte dès qu'elle est scrapée
+        """
+        history = self.scraped_data or load_history()
+        urls = prioritize_urls(self.urls, previous_data=history)
         self.scraped_data = []
-        total_urls = len(self.urls)
+        total_urls = len(urls)
         percent_per_link = 100 / total_urls if total_urls else 100
 
-        for i, url in enumerate(self.urls):
+        for i, url in enumerate(urls):
             data = scrape_urls([url])
             if data:
                 self.scraped_data.extend(data)
+                if on_card is not None:
+                    for card in data:
+                        on_card(card)
             self.update_progress((i + 1) * percent_per_link)
             time.sleep(random.uniform(1, 2))
 
-        self.log(f"✅ {len(self.scraped_data)} cartes scrapées.")
+        failures = [card for card in self.scraped_data if card.get("Statut") == "échec"]
+        no_offers = [card for card in self.scraped_data if card.get("Statut") == "aucune offre"]
+        self.log(f"✅ {len(self.scraped_data) - len(failures)} cartes scrapées "
+                 f"({len(no_offers)} sans offre), {len(failures)} échecs.")
+        for card in failures:
+            self.log(f"❌ Échec : {card['URL']} ({card.get('Erreur')})")
+        update_history(self.scraped_data)
         self.optimize_manual_button.configure(state="normal")
 
     def start_optimization(self):
@@ -370,22 +392,67 @@ class ScrapOptimizerApp:
             return
         threading.Thread(target=self.optimize_task, args=(False,)).start()
 
+    def provisional_task(self, cards_queue, optimizer, prefetcher):
+        """
+        Consomme les cartes scrapées au fil de l'eau (None = fin du scraping) et affiche
+        un panier provisoire, sans ralentir le scraping qui tourne dans un autre thread.
+        - les profils vendeurs de chaque carte sont préchargés en arrière-plan par `prefetcher`,
+          pour qu'il ne reste que peu de vendeurs à charger à la fin du scraping
+        - les frais de port provisoires ne viennent que du cache vendeurs, avec la valeur du
+          panier de chaque vendeur calculée sur toutes les cartes reçues (pas la seule dernière)
+        """
+        while True:
+            card = cards_queue.get()
+            if card is None:
+                break
+            prefetcher.submit(self.seller_cache.prefetch, [card], save=False)
+            optimizer.add_card(card)
+            optimizer.update_shipping_costs(self.seller_cache.shipping_costs(optimizer.cards, fetch=False))
+
+            _, _, _, best_final, _ = optimizer.best_price()
+            _, _, _, opt_final, opt_vendors = optimizer.provisional_optimized()
+            self.result_label.configure(
+                text=f"⏳ Estimation provisoire ({len(optimizer.cards)}/{len(self.urls)} cartes) : "
+                     f"~{round(min(best_final, opt_final), 2)}€ | {opt_vendors} vendeurs"
+            )
+
     def optimize_task(self, do_scraping):
         try:
+            optimizer = IncrementalOptimizer(tolerance=0.10, shipping_cost_per_vendor=8)
+            lookups_before = self.seller_cache.lookups
             if do_scraping:
-                self.scrape_task()
+                # Pipeline : le scraping alimente l'optimiseur incrémental carte par carte,
+                # et les profils vendeurs sont chargés pendant que les cartes arrivent
+                cards_queue = queue.Queue()
+                prefetcher = ThreadPoolExecutor(max_workers=SELLER_PREFETCH_WORKERS)
+                consumer = threading.Thread(target=self.provisional_task,
+                                            args=(cards_queue, optimizer, prefetcher))
+                consumer.start()
+                try:
+                    self.scrape_task(on_card=cards_queue.put)
+                finally:
+                    cards_queue.put(None)
+                    consumer.join()
+                    self.log("🚚 Fin du chargement des frais de port des vendeurs...")
+                    prefetcher.shutdown(wait=True)  # seulement les vendeurs des dernières cartes
+                self.result_label.configure(text="")
+            else:
+                for card in self.scraped_data:
+                    optimizer.add_card(card)
+                self.log("🚚 Récupération des frais de port des vendeurs...")
+
+            # Frais de port : les vendeurs encore absents du cache (aucun sur un lancement à chaud
+            # ou après le préchargement), puis un seul enregistrement du cache
+            shipping_costs = self.seller_cache.shipping_costs(optimizer.cards)
+            optimizer.update_shipping_costs(shipping_costs)
+            self.log(f"🚚 {len(shipping_costs)} vendeurs connus, "
+                     f"{self.seller_cache.lookups - lookups_before} profils récupérés.")
 
             self.log("⚙️ Optimisation en cours...")
 
-            best_cart, best_cost, best_shipping, best_final, best_vendors = full_best_price(
-                self.scraped_data,
-                shipping_cost_per_vendor=8
-            )
-            optimized_cart, opt_cost, opt_shipping, opt_final, opt_vendors = optimize_cart(
-                self.scraped_data,
-                tolerance=0.10,
-                shipping_cost_per_vendor=8
-            )
+            # Résultat final tiré de l'optimiseur incrémental
+            best_cart, best_cost, best_shipping, best_final, best_vendors = optimizer.best_price()
+            optimized_cart, opt_cost, opt_shipping, opt_final, opt_vendors = optimizer.optimized()
             self.optimized_data = optimized_cart
             self.update_progress(100)
 
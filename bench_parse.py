@@ -0,0 +1,36 @@
+import sys
+import time
+
+from main import parse_card_page
+from page_archive import PageArchive
+from retry_policy import ScrapeError
+
+# 📌 Benchmark du parsing sur une archive enregistrée (aucun navigateur, aucun réseau)
+def bench_parse(filename="pages.jsonl.gz", rounds=5):
+    """Mesure le débit (pages/seconde) de parse_card_page sur les pages de l'archive."""
+    pages = [page["HTML"] for page in PageArchive(filename).pages()]
+    if not pages:
+        print(f"⚠️ Archive vide : {filename}")
+        return 0.0
+
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for html in pages:
+            try:
+                parse_card_page(html)
+            except ScrapeError:
+                pass  # page en échec : le classement fait partie du travail mesuré
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    pages_per_second = len(pages) / best if best else float("inf")
+    print(f"📊 {len(pages)} pages, meilleur passage sur {rounds} : {best:.3f}s "
+          f"→ {pages_per_second:.1f} pages/s")
+    return pages_per_second
+
+# Utilisation : python bench_parse.py [archive] [passages]
+if __name__ == "__main__":
+    archive_file = sys.argv[1] if len(sys.argv) > 1 else "pages.jsonl.gz"
+    nb_rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    bench_parse(archive_file, nb_rounds)
@@ -0,0 +1,38 @@
+import sys
+import time
+
+import numpy as np
+
+from price_parser import parse_price_parts
+
+# 📌 Benchmark du parsing de prix en masse sur des textes synthétiques
+FORMATS = [
+    lambda v: f"{v:,.2f}".replace(",", " ").replace(".", ",").replace(" ", ".") + " €",  # 1.234,56 €
+    lambda v: f"€{v:,.2f}",                                                          # €1,234.56
+    lambda v: f"£{v:,.2f}",                                                          # £1,234.56
+    lambda v: f"{v:,.2f} €".replace(",", " ").replace(".", ","),                     # 1 234,56 €
+    lambda v: f"CHF {v:,.2f}".replace(",", "'"),                                     # CHF 1'234.56
+    lambda v: "N/A",                                                                 # prix invalide
+]
+
+def make_price_texts(count, seed=0):
+    """Génère `count` textes de prix dans des formats EUR / GBP / CHF variés (~1/6 invalides)."""
+    rng = np.random.default_rng(seed)
+    values = np.round(rng.lognormal(mean=1.0, sigma=2.0, size=count), 2)
+    formats = rng.integers(0, len(FORMATS), size=count)
+    return [FORMATS[f](v) for f, v in zip(formats, values)]
+
+def bench_prices(count=1_000_000):
+    """Mesure le débit (textes/seconde) de parse_price_parts, le parseur des pages live et des archives."""
+    texts = make_price_texts(count)
+
+    start = time.perf_counter()
+    invalid = sum(1 for text in texts if parse_price_parts(text)[0] is None)
+    elapsed = time.perf_counter() - start
+
+    print(f"📊 {count} prix en {elapsed:.2f}s → {count / elapsed:,.0f} prix/s ({invalid} invalides)")
+    return count / elapsed
+
+# Utilisation : python bench_prices.py [nombre de prix]
+if __name__ == "__main__":
+    bench_prices(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
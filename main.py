@@ -1,17 +1,34 @@
 import json
-import re
+import queue
+import threading
 import time
 import pandas as pd
+from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from webdriver_manager.chrome import ChromeDriverManager
 
-def extract_card_data(url, retries=3):
-    """ Scrape les infos d'une carte et ses 10 meilleures offres, avec 3 tentatives max """
+from price_parser import DEFAULT_CURRENCY, parse_price_parts
+from retry_policy import PERMANENT, PermanentScrapeError, TransientScrapeError, default_policy
+
+CARDMARKET_BASE_URL = "https://www.cardmarket.com"
+HISTORY_FILE = "scrape_history.json"  # Historique des scrapings, distinct du panier courant (data.json)
+
+# 📌 Textes permettant de classer une page sans titre produit
+CHALLENGE_MARKERS = ("cf-challenge", "challenge-platform", "Just a moment")
+NOT_FOUND_MARKERS = ("404", "Page not found", "Page introuvable", "n'existe pas")
+
+_chrome_service = None
+_chrome_service_lock = threading.Lock()
+
+def create_driver():
+    """ Crée un navigateur Chrome headless (le chromedriver n'est installé qu'une fois par exécution) """
+    global _chrome_service
 
     options = Options()
     options.add_argument("--headless")
@@ -24,78 +41,253 @@ def extract_card_data(url, retries=3):
     options.add_experimental_option("useAutomationExtension", False)
     options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/100.0.4896.127 Safari/537.36")
 
-    service = Service(ChromeDriverManager().install())
+    with _chrome_service_lock:
+        if _chrome_service is None:
+            _chrome_service = Service(ChromeDriverManager().install())
+
+    return webdriver.Chrome(service=_chrome_service, options=options)
+
+class DriverPool:
+    """
+    Pool de navigateurs Chrome réutilisés d'une page à l'autre (utile pour un process long,
+    voir server.py). Au plus `size` navigateurs ouverts, créés à la demande.
+    """
+
+    def __init__(self, size=2):
+        self.size = size
+        self._idle = queue.Queue()
+        self._slots = threading.Semaphore(size)
+
+    def acquire(self):
+        """Retourne un navigateur libre (bloque si les `size` navigateurs sont occupés)."""
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return create_driver()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def release(self, driver):
+        """Remet un navigateur en état de marche dans le pool."""
+        self._idle.put(driver)
+        self._slots.release()
+
+    def discard(self, driver):
+        """Ferme un navigateur en erreur au lieu de le remettre dans le pool."""
+        try:
+            driver.quit()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Ferme tous les navigateurs inactifs."""
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except queue.Empty:
+                break
+
+def extract_card_page(html):
+    """
+    Extrait le nom, l'extension et les 10 meilleures offres brutes (prix encore en texte)
+    depuis le HTML d'une page produit. Les prix sont convertis par build_card.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+
+    # 📌 Extraction du nom de la carte (sans titre, la page n'est pas une page produit exploitable)
+    title_container = soup.select_one('.page-title-container h1')
+    if title_container is None:
+        page_title = soup.title.get_text(strip=True) if soup.title else ""
+        if any(marker in html for marker in CHALLENGE_MARKERS):
+            raise TransientScrapeError("Challenge anti-bot, page produit non servie")
+        if any(marker in page_title for marker in NOT_FOUND_MARKERS):
+            raise PermanentScrapeError(f"Produit introuvable ({page_title})")
+        raise TransientScrapeError("Titre de la carte absent, page incomplète")
+    card_name = title_container.get_text(" ", strip=True).split('(')[0].strip()
+
+    # 📌 Extraction du nom de l'extension
+    breadcrumb = soup.select('nav[aria-label="breadcrumb"] span[property="name"]')
+    extension = breadcrumb[3].get_text(strip=True) if len(breadcrumb) > 3 else "Extension inconnue"
+
+    # 📌 Extraction des offres (10 max maintenant)
+    rows = []
+    offer_rows = soup.select("div.article-row")
+    for row in offer_rows[:10]:  # Prendre max 10 offres
+        try:
+            # 🔹 Vendeur
+            seller_link = row.select_one(".seller-name a")
+            seller_url = seller_link.get("href", "")
+            if seller_url.startswith("/"):
+                seller_url = CARDMARKET_BASE_URL + seller_url
+
+            # 🔹 Prix (texte brut)
+            price_text = row.select_one(".price-container span.color-primary").get_text(strip=True)
+
+            rows.append({
+                "Vendeur": seller_link.get_text(strip=True),
+                "Lien vendeur": seller_url,
+                "Prix texte": price_text
+            })
+        except Exception as e:
+            print(f"⚠️ Erreur en récupérant une offre : {e}")
+
+    return {
+        "Nom de la carte": card_name,
+        "Extension": extension,
+        "Lignes": rows,
+        "Nb lignes": len(offer_rows)
+    }
+
+def build_card(page, prices):
+    """
+    Construit la carte à partir de extract_card_page et des prix convertis
+    (liste de (prix ou None, devise) alignée sur page["Lignes"]).
+    Un prix illisible ou dans une autre devise que l'euro va dans "Offres invalides",
+    avec son motif : il n'est jamais stocké à None ni additionné à des euros.
+    """
+    offers = []
+    invalid_offers = []
+    for row, (price, currency) in zip(page["Lignes"], prices):
+        if price is not None and currency == DEFAULT_CURRENCY:
+            offers.append({
+                "Vendeur": row["Vendeur"],
+                "Lien vendeur": row["Lien vendeur"],
+                "Prix": price,
+                "Devise": currency
+            })
+        else:
+            motif = "prix illisible" if price is None else f"devise {currency} non prise en charge"
+            print(f"⚠️ Offre ignorée ({motif}) : {row['Prix texte']}")
+            invalid_offers.append({**row, "Devise": currency, "Motif": motif})
+
+    if page["Nb lignes"] and not offers and all(o["Motif"] == "prix illisible" for o in invalid_offers):
+        # Des offres sont affichées mais aucune n'est lisible : la structure de la page a changé
+        raise PermanentScrapeError("Aucune offre lisible sur la page")
+
+    return {
+        "Nom de la carte": page["Nom de la carte"],
+        "Extension": page["Extension"],
+        "Offres": offers,
+        "Offres invalides": invalid_offers,
+        "Statut": "ok" if offers else "aucune offre"
+    }
+
+def parse_card_page(html):
+    """ Extrait le nom, l'extension et les 10 meilleures offres depuis le HTML d'une page produit """
+    page = extract_card_page(html)
+    return build_card(page, [parse_price_parts(row["Prix texte"]) for row in page["Lignes"]])
 
+def failed_card(url, error):
+    """ Carte dont le scraping a échoué : distincte d'une carte sans offre (Statut "échec") """
+    return {
+        "Nom de la carte": "Nom inconnu",
+        "Extension": "Extension inconnue",
+        "Offres": [],
+        "Statut": "échec",
+        "Erreur": str(error),
+        "URL": url
+    }
+
+def load_page(driver, url, policy):
+    """
+    Charge une page avec le timeout appris par la politique (driver.set_page_load_timeout)
+    et lui transmet la durée du chargement. Utilisé pour les pages produit et vendeur.
+    """
+    driver.set_page_load_timeout(policy.timeout())
+    start = time.monotonic()
+    try:
+        driver.get(url)
+    except TimeoutException:
+        # Chargement trop long : compté comme une latence au moins égale au timeout
+        policy.record_latency(time.monotonic() - start)
+        raise
+    policy.record_latency(time.monotonic() - start)
+
+def extract_card_data(url, retries=3, archive=None, pool=None, policy=None):
+    """
+    Scrape les infos d'une carte et ses 10 meilleures offres, avec 3 tentatives max.
+    - archive : PageArchive optionnelle, chaque page récupérée y est enregistrée (mode record)
+    - pool : DriverPool optionnel, sinon un navigateur est créé puis fermé à chaque tentative
+    - policy : RetryPolicy (timeouts adaptatifs, classification des erreurs, disjoncteur),
+      par défaut la politique partagée default_policy
+    Retourne la carte avec un "Statut" : "ok", "aucune offre" ou "échec" (voir failed_card)
+    """
+    policy = policy or default_policy
+    last_error = None
     attempt = 0
     while attempt < retries:
         attempt += 1
-        driver = webdriver.Chrome(service=service, options=options)
+        policy.breaker.wait_if_open()
+        driver = None
 
         try:
+            # Démarrage de Chrome dans le try : son échec est l'erreur temporaire la plus courante
+            driver = pool.acquire() if pool is not None else create_driver()
+
             print(f"🔄 Tentative {attempt}/{retries} pour {url} ...")
-            driver.get(url)
-            wait = WebDriverWait(driver, 20)
+            load_page(driver, url, policy)
 
-            # 📌 Extraction du nom de la carte
+            # 📌 Attendre séparément le titre, le fil d'Ariane (extension) et les offres
+            # (rendus après le chargement) : un élément absent n'empêche pas d'attendre les suivants
             try:
-                title_container = wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, '.page-title-container h1')))
-                card_name = title_container.text.split('(')[0].strip()
-            except Exception:
-                card_name = "Nom inconnu"
+                WebDriverWait(driver, policy.element_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, '.page-title-container h1'))
+                )
+            except TimeoutException:
+                pass  # Titre absent : parse_card_page dira si la page est introuvable ou incomplète
 
-            # 📌 Extraction du nom de l'extension
             try:
-                breadcrumb = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'nav[aria-label="breadcrumb"] span[property="name"]')))
-                extension = breadcrumb[3].text if len(breadcrumb) > 3 else "Extension inconnue"
-            except Exception:
-                extension = "Extension inconnue"
+                WebDriverWait(driver, policy.element_timeout).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, 'nav[aria-label="breadcrumb"] span[property="name"]'))
+                )
+            except TimeoutException:
+                pass  # L'extension sera "Extension inconnue"
 
-            # 📌 Extraction des offres (10 max maintenant)
-            offers = []
+            # 📌 Leur absence signifie simplement que la carte n'a pas d'offre
             try:
-                offer_rows = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.article-row")))
-
-                for row in offer_rows[:10]:  # Prendre max 10 offres
-                    try:
-                        # 🔹 Vendeur
-                        seller_name = row.find_element(By.CSS_SELECTOR, ".seller-name a").text.strip()
-
-                        # 🔹 Prix avec correction du format
-                        price_text = row.find_element(By.CSS_SELECTOR, ".price-container span.color-primary").text.strip()
-                        price_text = re.sub(r"[^\d,.-]", "", price_text)
-                        price_text = price_text.replace(",", ".")
-                        price_text = re.sub(r"\.(?=\d{3})", "", price_text)
-
-                        try:
-                            price = float(price_text)
-                        except ValueError:
-                            print(f"⚠️ Problème de conversion pour le prix : {price_text}")
-                            price = None
-
-                        offers.append({
-                            "Vendeur": seller_name,
-                            "Prix": price
-                        })
-                    except Exception as e:
-                        print(f"⚠️ Erreur en récupérant une offre : {e}")
+                WebDriverWait(driver, policy.element_timeout).until(
+                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div.article-row"))
+                )
+            except TimeoutException:
+                pass
 
-            except Exception:
-                print("⚠️ Impossible de récupérer les offres")
-                offers = []
+            html = driver.page_source
+            if archive is not None:
+                archive.record(url, html)
 
-            driver.quit()
-            return {
-                "Nom de la carte": card_name,
-                "Extension": extension,
-                "Offres": offers
-            }
+            data = parse_card_page(html)
 
         except Exception as e:
-            print(f"❌ Erreur lors de la tentative {attempt} : {e}")
-            driver.quit()
+            kind = policy.classify(e)
+            policy.record_failure(kind)
+            last_error = e
+            print(f"❌ Erreur {kind} lors de la tentative {attempt} : {e}")
+            if driver is not None:
+                if pool is not None:
+                    pool.discard(driver)
+                else:
+                    driver.quit()
+            if kind == PERMANENT:
+                break
             if attempt < retries:
-                print(f"⏳ Nouvelle tentative dans 2 secondes...")
-                time.sleep(2)  # Réduction du temps d'attente
+                delay = policy.backoff(attempt)
+                print(f"⏳ Nouvelle tentative dans {delay:.1f} secondes...")
+                time.sleep(delay)
+            continue
+
+        if pool is not None:
+            pool.release(driver)
+        else:
+            driver.quit()
+
+        policy.record_success()
+        data["URL"] = url
+        return data
+
+    return failed_card(url, last_error)
 
 def save_to_json(data, filename="data.json"):
     """ Enregistre les données scrapées dans un fichier JSON """
@@ -115,6 +307,64 @@ def save_to_excel(data, filename="scraped_data.xlsx"):
     df.to_excel(filename, index=False)
     print(f"✅ Données exportées dans {filename}")
 
+def url_key(url):
+    """ Clé d'une URL de carte, sans le filtre de recherche (partie après le '?') """
+    return url.split("?", 1)[0]
+
+def prioritize_urls(url_list, previous_data=None):
+    """
+    Ordonne les URLs pour scraper d'abord les cartes qui pèsent le plus sur le panier,
+    d'après un scraping précédent (previous_data) :
+      1) les cartes les plus chères (meilleur prix le plus élevé)
+      2) à prix égal, celles qui ont le moins d'offres
+    Les URLs sans historique sont scrapées ensuite, dans leur ordre d'origine.
+    L'historique vient de HISTORY_FILE (voir load_history / update_history) : au tout premier
+    lancement il est vide et les URLs sont scrapées dans l'ordre du fichier.
+    """
+    history = {}
+    for card in previous_data or []:
+        prices = [o["Prix"] for o in card.get("Offres", []) if o.get("Prix") is not None]
+        if card.get("URL") and prices:
+            history[url_key(card["URL"])] = (min(prices), len(prices))
+
+    known = [url for url in url_list if url_key(url) in history]
+    unknown = [url for url in url_list if url_key(url) not in history]
+    known.sort(key=lambda url: (-history[url_key(url)][0], history[url_key(url)][1]))
+    return known + unknown
+
+def load_history(filename=HISTORY_FILE):
+    """ Charge le dernier scraping enregistré (historique pour prioritize_urls), [] s'il n'existe pas """
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return []
+
+def update_history(new_data, filename=HISTORY_FILE):
+    """
+    Fusionne un scraping dans l'historique (une entrée par URL, la plus récente gagne)
+    pour que le prochain lancement, même à froid, puisse prioriser les URLs.
+    Les échecs ne remplacent pas une entrée existante. data.json (panier courant) n'est pas touché.
+    """
+    history = {url_key(card["URL"]): card for card in load_history(filename) if card.get("URL")}
+    for card in new_data:
+        if card.get("URL") and (card.get("Statut") != "échec" or url_key(card["URL"]) not in history):
+            history[url_key(card["URL"])] = card
+    save_to_json(list(history.values()), filename)
+
+def scrape_urls(url_list, archive=None, pool=None):
+    """
+    Scrape toutes les URLs de la liste et retourne les données sous forme de JSON.
+    - archive : PageArchive optionnelle pour enregistrer les pages récupérées
+    - pool : DriverPool optionnel pour réutiliser les navigateurs
+    """
+    all_data = []
+    for url in url_list:
+        data = extract_card_data(url, archive=archive, pool=pool)
+        if data:
+            all_data.append(data)
+    return all_data
+
 # 📌 Scraper plusieurs cartes et stocker en JSON & Excel
 def main():
     urls = load_urls_from_file("urls.txt")  # Assure-toi que ce fichier contient tes liens
@@ -132,15 +382,6 @@ def main():
 if __name__ == "__main__":
     main()
 
-def scrape_urls(url_list):
-    """Scrape toutes les URLs de la liste et retourne les données sous forme de JSON."""
-    all_data = []
-    for url in url_list:
-        data = extract_card_data(url)
-        if data:
-            all_data.append(data)
-    return all_data
-
 # Exécuter uniquement si ce fichier est lancé directement
 if __name__ == "__main__":
     sample_urls = ["https://example.com/card1", "https://example.com/card2"]
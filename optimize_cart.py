@@ -18,10 +18,22 @@ def load_json(filename="data.json"):
         logging.error(f"Erreur lors du chargement du JSON : {e}")
         return []
 
-def full_best_price(cards, shipping_cost_per_vendor=8):
+def vendor_shipping_cost(vendor, shipping_costs=None, shipping_cost_per_vendor=8):
+    """Frais de port d'un vendeur : valeur du cache vendeurs si connue, sinon le forfait."""
+    if shipping_costs and vendor in shipping_costs:
+        return shipping_costs[vendor]
+    return shipping_cost_per_vendor
+
+def priced_offers(card):
+    """Offres dont le prix est exploitable (les anciens JSON peuvent contenir des prix à None)."""
+    return [offer for offer in card.get("Offres", []) if offer.get("Prix") is not None]
+
+def full_best_price(cards, shipping_cost_per_vendor=8, shipping_costs=None):
     """
     Scénario 1 : Prendre toujours l'offre la moins chère.
     - shipping_cost_per_vendor: frais de port fixe par vendeur unique.
+    - shipping_costs: dict optionnel {vendeur: frais de port} (voir SellerProfileCache),
+      prioritaire sur le forfait pour les vendeurs connus.
     Retourne : (liste d'offres sélectionnées, coût total cartes, frais de port total, total final, nb vendeurs)
     """
     selected_offers = []
@@ -29,7 +41,7 @@ def full_best_price(cards, shipping_cost_per_vendor=8):
     total_cost = 0.0
 
     for card in cards:
-        offers = card.get("Offres", [])
+        offers = priced_offers(card)
         if not offers:
             # Carte sans offres
             continue
@@ -46,18 +58,22 @@ def full_best_price(cards, shipping_cost_per_vendor=8):
             vendor_totals[best_offer["Vendeur"]] += best_offer["Prix"]
             total_cost += best_offer["Prix"]
 
-    # Frais de port = shipping_cost_per_vendor * nb vendeurs
+    # Frais de port = somme des frais de chaque vendeur unique
     num_vendors = len(vendor_totals)
-    shipping_cost = shipping_cost_per_vendor * num_vendors
+    shipping_cost = sum(
+        vendor_shipping_cost(vendor, shipping_costs, shipping_cost_per_vendor)
+        for vendor in vendor_totals
+    )
     final_total_cost = total_cost + shipping_cost
 
     return selected_offers, total_cost, shipping_cost, final_total_cost, num_vendors
 
-def optimize_cart(cards, tolerance=0.10, shipping_cost_per_vendor=8):
+def optimize_cart(cards, tolerance=0.10, shipping_cost_per_vendor=8, shipping_costs=None):
     """
     Scénario 2 : Optimisation avancée pour réduire le nombre de vendeurs.
       - tolerance (float) : on peut payer jusqu'à +10% (par défaut) sur le prix minimal
         afin de regrouper les achats chez un même vendeur.
+      - shipping_costs (dict) : frais de port par vendeur, prioritaires sur le forfait.
     Retourne : (liste d'offres sélectionnées, coût total cartes, frais de port total, total final, nb vendeurs)
     """
     selected_offers = []
@@ -65,10 +81,10 @@ def optimize_cart(cards, tolerance=0.10, shipping_cost_per_vendor=8):
     total_cost = 0.0
 
     # Trier les cartes par nombre d'offres disponibles (celles qui ont le moins d'offres en priorité)
-    cards_sorted = sorted(cards, key=lambda x: len(x.get("Offres", [])))
+    cards_sorted = sorted(cards, key=lambda x: len(priced_offers(x)))
 
     for card in cards_sorted:
-        offers = card.get("Offres", [])
+        offers = priced_offers(card)
         if not offers:
             # Aucune offre pour cette carte
             continue
@@ -76,13 +92,17 @@ def optimize_cart(cards, tolerance=0.10, shipping_cost_per_vendor=8):
         # Trier les offres par prix croissant
         sorted_offers = sorted(offers, key=lambda x: x["Prix"])
         cheapest_price = sorted_offers[0]["Prix"]  # prix le moins cher
+        # Frais de port économisés si on évite le vendeur le moins cher
+        cheapest_shipping = vendor_shipping_cost(
+            sorted_offers[0]["Vendeur"], shipping_costs, shipping_cost_per_vendor
+        )
 
         best_offer = None
         # 1) Vérifier si on peut rester chez un vendeur déjà sélectionné sans payer trop
         for offer in sorted_offers:
             if offer["Vendeur"] in vendor_items:
                 # différence par rapport au moins cher
-                if (offer["Prix"] - cheapest_price) <= (shipping_cost_per_vendor / 2):
+                if (offer["Prix"] - cheapest_price) <= (cheapest_shipping / 2):
                     best_offer = offer
                     break
 
@@ -108,13 +128,85 @@ def optimize_cart(cards, tolerance=0.10, shipping_cost_per_vendor=8):
             vendor_items[best_offer["Vendeur"]] += best_offer["Prix"]
             total_cost += best_offer["Prix"]
 
-    # Frais de port = shipping_cost_per_vendor * nb vendeurs uniques
+    # Frais de port = somme des frais de chaque vendeur unique
     num_unique_vendors = len(vendor_items)
-    total_shipping_cost = shipping_cost_per_vendor * num_unique_vendors
+    total_shipping_cost = sum(
+        vendor_shipping_cost(vendor, shipping_costs, shipping_cost_per_vendor)
+        for vendor in vendor_items
+    )
     final_total_cost = total_cost + total_shipping_cost
 
     return selected_offers, total_cost, total_shipping_cost, final_total_cost, num_unique_vendors
 
+class IncrementalOptimizer:
+    """
+    Optimiseur alimenté carte par carte pendant le scraping.
+    - Scénario 1 : mis à jour incrémentalement à chaque carte (O(1) par carte)
+    - Scénario 2 : optimize_cart dépend de l'ordre de toutes les cartes, il est donc recalculé
+      en entier, mais seulement quand le nombre de cartes a doublé depuis le dernier calcul
+      (provisional_optimized), soit un coût total linéaire sur le scraping ; optimized() donne
+      le résultat exact sur toutes les cartes reçues
+    """
+
+    def __init__(self, tolerance=0.10, shipping_cost_per_vendor=8, shipping_costs=None):
+        self.tolerance = tolerance
+        self.shipping_cost_per_vendor = shipping_cost_per_vendor
+        self.shipping_costs = dict(shipping_costs or {})
+        self.cards = []
+        # État du scénario 1, mis à jour incrémentalement (le choix d'une carte ne dépend que d'elle)
+        self.best_offers = []
+        self.best_vendor_totals = defaultdict(float)
+        self.best_cost = 0.0
+        # Dernier calcul du scénario 2 et nombre de cartes qu'il couvrait
+        self._optimized = None
+        self._optimized_size = 0
+        self._shipping_changed = False
+
+    def add_card(self, card):
+        """Ajoute une carte scrapée au panier provisoire."""
+        self.cards.append(card)
+        selected, cost, _, _, _ = full_best_price([card], self.shipping_cost_per_vendor)
+        for offer in selected:
+            self.best_offers.append(offer)
+            self.best_vendor_totals[offer["Vendeur"]] += offer["Prix"]
+        self.best_cost += cost
+
+    def update_shipping_costs(self, shipping_costs):
+        """Complète les frais de port connus par vendeur (voir SellerProfileCache)."""
+        changed = {v: c for v, c in shipping_costs.items() if self.shipping_costs.get(v) != c}
+        if changed:
+            self.shipping_costs.update(changed)
+            self._shipping_changed = True
+
+    def best_price(self):
+        """Scénario 1 sur les cartes reçues : même retour que full_best_price."""
+        shipping_cost = sum(
+            vendor_shipping_cost(vendor, self.shipping_costs, self.shipping_cost_per_vendor)
+            for vendor in self.best_vendor_totals
+        )
+        return (list(self.best_offers), self.best_cost, shipping_cost,
+                self.best_cost + shipping_cost, len(self.best_vendor_totals))
+
+    def optimized(self):
+        """Scénario 2 exact sur les cartes reçues : même retour que optimize_cart."""
+        if (self._optimized is None or self._shipping_changed
+                or self._optimized_size != len(self.cards)):
+            self._optimized = optimize_cart(
+                self.cards,
+                tolerance=self.tolerance,
+                shipping_cost_per_vendor=self.shipping_cost_per_vendor,
+                shipping_costs=self.shipping_costs
+            )
+            self._optimized_size = len(self.cards)
+            self._shipping_changed = False
+        return self._optimized
+
+    def provisional_optimized(self):
+        """Scénario 2 provisoire : recalculé seulement quand le nombre de cartes a doublé."""
+        if self._optimized is None or len(self.cards) >= 2 * self._optimized_size:
+            return self.optimized()
+        return self._optimized
+
 def save_to_excel(best_cart, best_vendors, best_cost, best_shipping, best_final,
                   optimized_cart, opt_vendors, opt_cost, opt_shipping, opt_final,
                   filename="optimized_cart.xlsx"):
@@ -159,17 +251,24 @@ if __name__ == "__main__":
     if not data:
         logging.warning("Aucune donnée à optimiser. Vérifiez le fichier data.json.")
     else:
+        from seller_profiles import SellerProfileCache
+
+        # Frais de port par vendeur (cache local, un seul chargement par vendeur)
+        shipping_costs = SellerProfileCache().shipping_costs(data)
+
         # Scénario 1
         best_cart, best_cost, best_shipping, best_final, best_vendors = full_best_price(
             data,
-            shipping_cost_per_vendor=8
+            shipping_cost_per_vendor=8,
+            shipping_costs=shipping_costs
         )
 
         # Scénario 2
         optimized_cart, opt_cost, opt_shipping, opt_final, opt_vendors = optimize_cart(
             data,
             tolerance=0.10,
-            shipping_cost_per_vendor=8
+            shipping_cost_per_vendor=8,
+            shipping_costs=shipping_costs
         )
 
         logging.info("\n=== Scénario 1 : Full Best Price ===")
@@ -0,0 +1,91 @@
+import gzip
+import json
+import sys
+import threading
+from datetime import datetime, timezone
+
+from retry_policy import ScrapeError
+from main import parse_card_page, failed_card, scrape_urls, load_urls_from_file, save_to_json
+
+# 📌 Archive locale des pages produit (record & replay)
+# Format : fichier JSON Lines compressé en gzip, une page par ligne :
+#   {"URL": ..., "Horodatage": ..., "HTML": ...}
+
+class PageArchive:
+    """
+    Archive compressée des pages produit récupérées.
+    - record() ajoute une page à la fin de l'archive (mode record), y compris les tentatives
+      ratées (challenge, page incomplète) : une URL réessayée y figure plusieurs fois
+    - pages() relit les pages enregistrées dans l'ordre (mode replay)
+    """
+
+    def __init__(self, filename="pages.jsonl.gz"):
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def record(self, url, html):
+        """Enregistre le HTML d'une page avec son URL et l'horodatage de récupération."""
+        entry = {
+            "URL": url,
+            "Horodatage": datetime.now(timezone.utc).isoformat(),
+            "HTML": html
+        }
+        with self._lock:
+            with gzip.open(self.filename, "at", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def pages(self):
+        """Itère sur les pages enregistrées (dictionnaires URL / Horodatage / HTML)."""
+        with gzip.open(self.filename, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def parse_pages(pages):
+    """
+    Parse des pages archivées avec le même parsing que le scraping live (parse_card_page).
+    Seule la dernière page enregistrée pour chaque URL est gardée (la tentative qui a
+    abouti, ou la dernière tentative ratée), comme le scraping live qui retourne une carte par URL.
+    Retourne les cartes au même format que scrape_urls (les pages en échec via failed_card).
+    """
+    latest = {}
+    for page in pages:
+        latest[page["URL"]] = page
+
+    all_data = []
+    for url, page in latest.items():
+        try:
+            data = parse_card_page(page["HTML"])
+        except ScrapeError as e:
+            data = failed_card(url, e)
+        data["URL"] = url
+        all_data.append(data)
+    return all_data
+
+def replay_archive(filename="pages.jsonl.gz"):
+    """
+    Rejoue une archive : chaque page passe par le même parsing que le scraping live,
+    sans navigateur ni réseau (voir parse_pages).
+    Retourne les données au même format que scrape_urls.
+    """
+    return parse_pages(PageArchive(filename).pages())
+
+def record_urls(url_list, filename="pages.jsonl.gz"):
+    """Scrape les URLs en live et enregistre chaque page récupérée dans l'archive."""
+    return scrape_urls(url_list, archive=PageArchive(filename))
+
+# Utilisation :
+#   python page_archive.py record urls.txt pages.jsonl.gz
+#   python page_archive.py replay pages.jsonl.gz
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ("record", "replay"):
+        print("Usage : python page_archive.py record <urls.txt> [archive] | replay <archive>")
+        sys.exit(1)
+
+    if sys.argv[1] == "record":
+        archive_file = sys.argv[3] if len(sys.argv) > 3 else "pages.jsonl.gz"
+        data = record_urls(load_urls_from_file(sys.argv[2]), archive_file)
+        print(f"✅ {len(data)} pages enregistrées dans {archive_file}")
+    else:
+        data = replay_archive(sys.argv[2])
+        save_to_json(data)
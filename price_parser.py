@@ -0,0 +1,52 @@
+import re
+
+# 📌 Parsing des prix (textes affichés par Cardmarket ou sur les pages vendeurs)
+# Formats gérés : "1.234,56 €", "€1,234.56", "£1,234.56", "1 234,56 €", "CHF 1'234.50", "12,5 Fr."
+# Règles :
+#   - le symbole / code devise donne la devise (EUR, GBP, CHF) ; sans symbole, DEFAULT_CURRENCY
+#   - espaces (y compris insécables) et apostrophes sont des séparateurs de milliers
+#   - un séparateur suivi de 1 ou 2 chiffres en fin de texte est le séparateur décimal
+#   - les séparateurs de milliers (. ou ,) sont suivis de groupes de 3 chiffres, tous identiques,
+#     et différents du séparateur décimal
+#   - un prix négatif n'est pas un prix d'offre : il est invalide
+# Tout texte qui ne respecte pas ces règles est invalide (Prix = None), jamais converti au hasard.
+
+DEFAULT_CURRENCY = "EUR"  # Cardmarket affiche les prix en euros
+
+CURRENCY_TOKENS = {
+    "€": "EUR", "EUR": "EUR",
+    "£": "GBP", "GBP": "GBP",
+    "CHF": "CHF", "SFr.": "CHF", "Fr.": "CHF",
+}
+
+_CURRENCY_RE = re.compile(r"€|EUR|£|GBP|CHF|SFr\.|Fr\.")
+_GROUPING_RE = re.compile(r"[\s'’]")
+_NUMBER_RE = re.compile(
+    r"(?P<int>\d{1,3}(?P<tsep>[.,])\d{3}(?:(?P=tsep)\d{3})*|\d+)"
+    r"(?:(?P<dsep>[.,])(?P<dec>\d{1,2}))?"
+)
+_THOUSANDS_RE = re.compile(r"[.,]")
+
+def parse_price_parts(price_text):
+    """
+    Parse un texte de prix avec des regex précompilées.
+    Retourne : (prix float ou None si invalide, devise)
+    """
+    if not price_text:
+        return None, None
+
+    token = _CURRENCY_RE.search(price_text)
+    currency = CURRENCY_TOKENS[token.group()] if token else DEFAULT_CURRENCY
+
+    cleaned = _GROUPING_RE.sub("", _CURRENCY_RE.sub("", price_text))
+    match = _NUMBER_RE.fullmatch(cleaned)
+    if match is None or (match["tsep"] and match["tsep"] == match["dsep"]):
+        return None, currency
+
+    price = float(_THOUSANDS_RE.sub("", match["int"]) + "." + (match["dec"] or "0"))
+    return price, currency
+
+def parse_price(price_text, currency=DEFAULT_CURRENCY):
+    """Parse un seul texte de prix : le float, ou None s'il est invalide ou dans une autre devise."""
+    price, price_currency = parse_price_parts(price_text)
+    return price if price_currency == currency else None
@@ -0,0 +1,142 @@
+import logging
+import random
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import InvalidArgumentException, WebDriverException
+
+# 📌 Politique de tentatives du scraper : timeouts adaptatifs, classification des erreurs
+# et disjoncteur (circuit breaker) qui met tout le lot en pause si le site sature.
+
+TRANSIENT = "temporaire"
+PERMANENT = "définitive"
+
+class ScrapeError(Exception):
+    """Erreur de scraping classée (voir RetryPolicy.classify)."""
+    kind = TRANSIENT
+
+class TransientScrapeError(ScrapeError):
+    """Page inexploitable pour l'instant (chargement incomplet, challenge anti-bot...) : on réessaie."""
+    kind = TRANSIENT
+
+class PermanentScrapeError(ScrapeError):
+    """Page qui ne sera jamais exploitable (produit introuvable, structure inconnue) : inutile de réessayer."""
+    kind = PERMANENT
+
+class CircuitBreaker:
+    """
+    Disjoncteur sur le taux d'échec des dernières tentatives.
+    - Ouvert dès que `failure_threshold` des `window` dernières tentatives ont échoué
+      (au moins `min_calls` tentatives observées)
+    - Tant qu'il est ouvert, wait_if_open() bloque le lot pendant `cooldown` secondes,
+      puis la fenêtre est remise à zéro (semi-ouvert)
+    """
+
+    def __init__(self, window=10, failure_threshold=0.5, min_calls=5, cooldown=60):
+        self.window = window
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def record(self, success):
+        """Enregistre le résultat d'une tentative et ouvre le disjoncteur si besoin."""
+        with self._lock:
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self._opened_at is None
+                    and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                logging.warning(f"Disjoncteur ouvert : {failures}/{len(self._outcomes)} échecs, "
+                                f"pause de {self.cooldown}s")
+
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None
+
+    def wait_if_open(self):
+        """Bloque jusqu'à la fin de la pause si le disjoncteur est ouvert."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.cooldown - (time.monotonic() - self._opened_at)
+
+        if remaining > 0:
+            print(f"⏸️ Trop d'échecs, pause du scraping pendant {remaining:.0f} secondes...")
+            time.sleep(remaining)
+
+        with self._lock:
+            if self._opened_at is not None:
+                self._opened_at = None
+                self._outcomes.clear()
+
+class RetryPolicy:
+    """
+    Paramètres des tentatives de extract_card_data, appris au fil des pages :
+    - timeout() : timeout de chargement de la page (driver.set_page_load_timeout), estimé à partir
+      des durées de driver.get observées (moyenne lissée + 4 écarts, comme le RTO de TCP),
+      borné entre min_timeout et max_timeout
+    - element_timeout : attente courte des éléments rendus après le chargement (titre, offres...)
+    - classify() : erreur temporaire (on réessaie) ou définitive (on abandonne la carte)
+    - backoff() : délai exponentiel avec jitter entre deux tentatives
+    """
+
+    def __init__(self, min_timeout=5, max_timeout=20, element_timeout=3,
+                 base_delay=2, max_delay=30, breaker=None):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.element_timeout = element_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker = breaker or CircuitBreaker()
+        self._mean_latency = None
+        self._latency_dev = None
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds):
+        """Met à jour l'estimation du temps de chargement d'une page (durée de driver.get)."""
+        with self._lock:
+            if self._mean_latency is None:
+                self._mean_latency = seconds
+                self._latency_dev = seconds / 2
+            else:
+                self._latency_dev = 0.75 * self._latency_dev + 0.25 * abs(seconds - self._mean_latency)
+                self._mean_latency = 0.875 * self._mean_latency + 0.125 * seconds
+
+    def timeout(self):
+        """Timeout de chargement à appliquer avant driver.get."""
+        with self._lock:
+            if self._mean_latency is None:
+                return self.max_timeout
+            estimate = self._mean_latency + 4 * self._latency_dev
+        return max(self.min_timeout, min(self.max_timeout, estimate))
+
+    def classify(self, error):
+        """Retourne TRANSIENT ou PERMANENT pour une exception levée pendant une tentative."""
+        if isinstance(error, ScrapeError):
+            return error.kind
+        if isinstance(error, InvalidArgumentException):
+            return PERMANENT  # URL mal formée
+        if isinstance(error, (WebDriverException, OSError)):
+            return TRANSIENT  # timeout, connexion, navigateur planté...
+        return PERMANENT  # bug de parsing : réessayer donnerait le même résultat
+
+    def backoff(self, attempt):
+        """Délai avant la tentative suivante (attempt = numéro de la tentative échouée)."""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def record_success(self):
+        self.breaker.record(True)
+
+    def record_failure(self, kind):
+        # Une erreur définitive concerne la page, pas la santé du site : elle ne compte pas
+        if kind == TRANSIENT:
+            self.breaker.record(False)
+
+# Politique partagée par défaut : les latences apprises et le disjoncteur valent pour tout le lot
+default_policy = RetryPolicy()
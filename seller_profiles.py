@@ -0,0 +1,279 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+
+from main import CHALLENGE_MARKERS, create_driver, load_page
+from price_parser import parse_price
+from retry_policy import PERMANENT, TransientScrapeError, default_policy
+
+# 📌 Sélecteurs de la page profil d'un vendeur
+COUNTRY_SELECTOR = '.page-title-container span[data-bs-original-title], .page-title-container span[aria-label]'
+SHIPPING_INFO_SELECTOR = "#shippingInfo"
+SHIPPING_ROW_SELECTOR = "#shippingInfo table tbody tr"
+
+DEFAULT_TTL = 7 * 24 * 3600  # Les frais de port d'un vendeur changent rarement : 7 jours
+EMPTY_TTL = 3600  # Grille vide (bloc présent mais aucune ligne lisible) : on réessaiera dans 1 heure
+FAILURE_TTL = 3600  # Échec de récupération : mis en cache négatif pendant 1 heure
+
+# 📌 Choix de la méthode d'envoi selon la valeur du panier chez le vendeur
+TRACKED_SHIPPING_THRESHOLD = 25  # au-delà (en €), on compte un envoi suivi
+TRACKED_KEYWORDS = ("suivi", "recommandé", "tracked", "registered", "einschreiben", "colis", "parcel")
+
+def select_shipping_cost(shipping_table, cart_value=0):
+    """
+    Frais de port à retenir dans la grille d'un vendeur pour un panier de `cart_value` €.
+    - en dessous de TRACKED_SHIPPING_THRESHOLD : la méthode la moins chère (lettre simple)
+    - au-dessus : la méthode suivie la moins chère (reconnue par son nom), sinon la plus chère
+      de la grille, qui est en pratique l'envoi le plus sûr
+    """
+    if not shipping_table:
+        return None
+    if cart_value < TRACKED_SHIPPING_THRESHOLD:
+        return min(shipping_table.values())
+
+    tracked = [price for method, price in shipping_table.items()
+               if any(keyword in method.lower() for keyword in TRACKED_KEYWORDS)]
+    return min(tracked) if tracked else max(shipping_table.values())
+
+def parse_seller_page(html):
+    """
+    Extrait le pays et la grille de frais de port depuis le HTML d'une page vendeur.
+    Retourne : {"Pays": str | None, "Frais de port": {méthode d'envoi: prix}}
+    Lève TransientScrapeError si le bloc des frais de port est absent (challenge anti-bot,
+    page incomplète) : une page non servie ne doit pas devenir une grille vide.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.select_one(SHIPPING_INFO_SELECTOR) is None:
+        if any(marker in html for marker in CHALLENGE_MARKERS):
+            raise TransientScrapeError("Challenge anti-bot, page vendeur non servie")
+        raise TransientScrapeError("Frais de port absents, page vendeur incomplète")
+
+    country = None
+    flag = soup.select_one(COUNTRY_SELECTOR)
+    if flag is not None:
+        country = flag.get("data-bs-original-title") or flag.get("aria-label")
+        # Ex: "Lieu de l'article : France" -> "France"
+        country = country.split(":")[-1].strip()
+
+    shipping_table = {}
+    for row in soup.select(SHIPPING_ROW_SELECTOR):
+        cells = row.find_all("td")
+        if len(cells) < 2:
+            continue
+        method = cells[0].get_text(" ", strip=True)
+        price = parse_price(cells[-1].get_text(strip=True))
+        if method and price is not None:
+            shipping_table[method] = price
+
+    return {
+        "Pays": country,
+        "Frais de port": shipping_table
+    }
+
+def fetch_seller_profile(seller_url, pool=None, policy=None, retries=2):
+    """
+    Charge la page d'un vendeur avec Selenium et retourne son profil.
+    Les chargements passent par la même politique que les pages produit : timeout appris,
+    classification des erreurs, backoff et disjoncteur (voir extract_card_data).
+    - pool : DriverPool optionnel (démon), sinon un navigateur est créé puis fermé
+    - policy : RetryPolicy, par défaut la politique partagée default_policy
+    Lève la dernière erreur si aucune tentative n'aboutit (le cache la met en cache négatif).
+    """
+    policy = policy or default_policy
+    last_error = None
+    attempt = 0
+    while attempt < retries:
+        attempt += 1
+        policy.breaker.wait_if_open()
+        driver = None
+
+        try:
+            driver = pool.acquire() if pool is not None else create_driver()
+            load_page(driver, seller_url, policy)
+
+            # 📌 La grille des frais de port est rendue après le chargement
+            try:
+                WebDriverWait(driver, policy.element_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, SHIPPING_INFO_SELECTOR))
+                )
+            except TimeoutException:
+                pass  # parse_seller_page dira si la page est un challenge ou incomplète
+
+            profile = parse_seller_page(driver.page_source)
+
+        except Exception as e:
+            kind = policy.classify(e)
+            policy.record_failure(kind)
+            last_error = e
+            logging.warning(f"Erreur {kind} sur la page vendeur {seller_url} (tentative {attempt}) : {e}")
+            if driver is not None:
+                if pool is not None:
+                    pool.discard(driver)
+                else:
+                    driver.quit()
+            if kind == PERMANENT:
+                break
+            if attempt < retries:
+                time.sleep(policy.backoff(attempt))
+            continue
+
+        if pool is not None:
+            pool.release(driver)
+        else:
+            driver.quit()
+
+        policy.record_success()
+        return profile
+
+    raise last_error
+
+class SellerProfileCache:
+    """
+    Cache local des profils vendeurs (pays + frais de port), partagé par toutes les cartes.
+    - Un vendeur n'est récupéré qu'une fois tant que son profil a moins de `ttl` secondes
+    - Le cache est persisté dans un fichier JSON, un lancement "à chaud" ne refait aucune requête
+    """
+
+    def __init__(self, filename="seller_profiles.json", ttl=DEFAULT_TTL, fetcher=fetch_seller_profile):
+        self.filename = filename
+        self.ttl = ttl
+        self.fetcher = fetcher
+        self.lookups = 0  # nombre de profils réellement demandés au site
+        self._lock = threading.Lock()
+        self._in_flight = {}  # vendeur -> threading.Event, pour ne pas charger deux fois le même
+        self._unsaved = False  # profils récupérés depuis le dernier enregistrement
+        self.profiles = self._load()
+
+    def _load(self):
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.error(f"Erreur lors du chargement du cache vendeurs : {e}")
+            return {}
+
+    def save(self):
+        """Enregistre le cache sur disque."""
+        with self._lock:
+            with open(self.filename, "w", encoding="utf-8") as f:
+                json.dump(self.profiles, f, indent=4, ensure_ascii=False)
+            self._unsaved = False
+
+    def _is_fresh(self, profile):
+        # Une entrée peut porter sa propre durée de vie (grille vide, échec)
+        return time.time() - profile.get("Horodatage", 0) < profile.get("TTL", self.ttl)
+
+    def get(self, seller, seller_url):
+        """
+        Retourne le profil d'un vendeur, en ne le récupérant que s'il est absent ou expiré.
+        Un même vendeur demandé par plusieurs threads n'est récupéré qu'une fois.
+        """
+        while True:
+            with self._lock:
+                profile = self.profiles.get(seller)
+                if profile is not None and self._is_fresh(profile):
+                    return profile
+                if not seller_url:
+                    return profile
+                in_flight = self._in_flight.get(seller)
+                if in_flight is None:
+                    in_flight = self._in_flight[seller] = threading.Event()
+                    break
+            # Un autre thread charge déjà ce vendeur : attendre son résultat
+            in_flight.wait()
+
+        try:
+            profile = self._fetch(seller, seller_url, profile)
+            with self._lock:
+                self.profiles[seller] = profile
+                self._unsaved = True
+            return profile
+        finally:
+            with self._lock:
+                del self._in_flight[seller]
+            in_flight.set()
+
+    def _fetch(self, seller, seller_url, previous):
+        """Récupère un profil ; grilles vides et échecs sont mis en cache avec une durée courte."""
+        with self._lock:
+            self.lookups += 1
+        try:
+            profile = self.fetcher(seller_url)
+        except Exception as e:
+            logging.error(f"Erreur lors de la récupération du vendeur {seller} : {e}")
+            # Cache négatif : on garde l'ancienne grille éventuelle, mais on ne réessaie pas avant FAILURE_TTL
+            profile = dict(previous or {"Pays": None, "Frais de port": {}})
+            profile["Erreur"] = str(e)
+            profile["TTL"] = FAILURE_TTL
+        else:
+            if not profile.get("Frais de port"):
+                logging.warning(f"Grille de frais de port vide pour le vendeur {seller}")
+                profile["TTL"] = EMPTY_TTL
+
+        profile["Horodatage"] = time.time()
+        return profile
+
+    def prefetch(self, cards, fetch=True, save=True):
+        """
+        Récupère une seule fois le profil de chaque vendeur distinct présent dans les offres,
+        puis enregistre le cache une seule fois si des profils ont été récupérés depuis le
+        dernier enregistrement.
+        - fetch=False : uniquement les profils déjà en cache, sans aucune requête ni écriture
+        - save=False : pas d'écriture (préchargement carte par carte pendant le scraping,
+          l'enregistrement se fait au prochain appel avec save=True)
+        Retourne : {vendeur: profil}
+        """
+        seller_urls = {}
+        for card in cards:
+            for offer in card.get("Offres", []):
+                seller = offer.get("Vendeur")
+                if seller and not seller_urls.get(seller):
+                    seller_urls[seller] = offer.get("Lien vendeur", "")
+
+        profiles = {}
+        if not fetch:
+            with self._lock:
+                for seller in seller_urls:
+                    if seller in self.profiles:
+                        profiles[seller] = self.profiles[seller]
+            return profiles
+
+        for seller, seller_url in seller_urls.items():
+            profile = self.get(seller, seller_url)
+            if profile is not None:
+                profiles[seller] = profile
+
+        if save and self._unsaved:
+            self.save()
+        return profiles
+
+    def shipping_costs(self, cards, fetch=True):
+        """
+        Frais de port par vendeur, à passer aux optimiseurs (paramètre shipping_costs).
+        La méthode d'envoi dépend de la valeur du panier chez le vendeur (voir select_shipping_cost),
+        estimée avant optimisation : somme des cartes pour lesquelles il a l'offre la moins chère.
+        Les vendeurs sans grille sont absents et les optimiseurs appliquent le forfait par défaut.
+        - fetch=False : seulement les vendeurs déjà en cache (estimations provisoires)
+        """
+        cart_values = defaultdict(float)
+        for card in cards:
+            offers = [o for o in card.get("Offres", []) if o.get("Prix") is not None]
+            if offers:
+                cheapest = min(offers, key=lambda o: o["Prix"])
+                cart_values[cheapest["Vendeur"]] += cheapest["Prix"]
+
+        costs = {}
+        for seller, profile in self.prefetch(cards, fetch=fetch).items():
+            cost = select_shipping_cost(profile.get("Frais de port") or {}, cart_values[seller])
+            if cost is not None:
+                costs[seller] = cost
+        return costs
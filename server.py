@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from main import DriverPool, extract_card_data
+from optimize_cart import full_best_price, optimize_cart, save_to_excel
+from seller_profiles import SellerProfileCache, fetch_seller_profile
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s"
+)
+
+# 📌 Démon local : garde pandas, les navigateurs, le cache vendeurs et les cartes scrapées
+# en mémoire entre deux requêtes. Les optimisations (gloutonnes, quelques millisecondes)
+# sont recalculées à chaque requête avec les frais de port à jour.
+#
+# Endpoints (JSON) :
+#   GET  /health    -> état du démon
+#   POST /scrape    {"urls": [...], "refresh": false}            -> {"cards": [...]}
+#   POST /optimize  {"cards": [...]} ou {"urls": [...]}, options -> résultats des 2 scénarios
+#   POST /export    idem /optimize + {"filename": "..."}          -> {"filename": "..."}
+# Options d'optimisation : "tolerance" (0.10), "shipping_cost_per_vendor" (8)
+#
+# Sécurité : le démon n'accepte que des requêtes JSON (Content-Type application/json, ce
+# qu'une page web ne peut pas envoyer sans préflight CORS) adressées à localhost (en-tête
+# Host, contre le DNS rebinding), et les exports sont écrits uniquement dans EXPORT_DIR.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CARD_TTL = 3600  # Les prix changent : une carte scrapée il y a plus d'1 heure est rescrapée
+EXPORT_DIR = "exports"
+ALLOWED_HOSTS = ("127.0.0.1", "localhost", "[::1]")
+
+def scenario_to_dict(result):
+    """Convertit le tuple retourné par full_best_price / optimize_cart en dict JSON."""
+    offers, cost, shipping, final, vendors = result
+    return {
+        "Offres": offers,
+        "Coût cartes": cost,
+        "Frais de port": shipping,
+        "Total": final,
+        "Vendeurs": vendors
+    }
+
+class OptimizerService:
+    """État chaud partagé par toutes les requêtes (thread-safe)."""
+
+    def __init__(self, pool_size=2):
+        self.pool = DriverPool(size=pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size)
+        # Les profils vendeurs passent aussi par le pool de navigateurs
+        self.seller_cache = SellerProfileCache(fetcher=lambda url: fetch_seller_profile(url, pool=self.pool))
+        self.cards = {}  # URL -> (carte scrapée, horodatage)
+        self._in_flight = {}  # URL -> Future du scraping en cours, partagé par les requêtes concurrentes
+        self._lock = threading.Lock()
+
+    def _scrape_one(self, url):
+        try:
+            card = extract_card_data(url, pool=self.pool)
+            # Un échec n'est pas mis en cache : il sera retenté à la prochaine requête
+            if card.get("Statut") != "échec":
+                with self._lock:
+                    self.cards[url] = (card, time.time())
+            return card
+        finally:
+            with self._lock:
+                del self._in_flight[url]
+
+    def scrape(self, urls, refresh=False):
+        """
+        Scrape les URLs absentes du cache, en parallèle sur le pool de navigateurs.
+        Une URL déjà en cours de scraping pour une autre requête n'est pas scrapée une deuxième fois :
+        les deux requêtes attendent le même résultat.
+        """
+        now = time.time()
+        futures = {}
+        with self._lock:
+            for url in urls:
+                if url in futures:
+                    continue
+                if url in self._in_flight:
+                    futures[url] = self._in_flight[url]
+                elif refresh or url not in self.cards or now - self.cards[url][1] >= CARD_TTL:
+                    futures[url] = self._in_flight[url] = self.executor.submit(self._scrape_one, url)
+
+        scraped = {url: future.result() for url, future in futures.items()}
+
+        with self._lock:
+            return [scraped[url] if url in scraped else self.cards[url][0]
+                    for url in urls if url in scraped or url in self.cards]
+
+    def optimize(self, cards, tolerance=0.10, shipping_cost_per_vendor=8):
+        """Calcule les deux scénarios avec les frais de port actuels du cache vendeurs."""
+        shipping_costs = self.seller_cache.shipping_costs(cards)
+        return {
+            "Full Best Price": scenario_to_dict(full_best_price(
+                cards,
+                shipping_cost_per_vendor=shipping_cost_per_vendor,
+                shipping_costs=shipping_costs
+            )),
+            "Optimisé": scenario_to_dict(optimize_cart(
+                cards,
+                tolerance=tolerance,
+                shipping_cost_per_vendor=shipping_cost_per_vendor,
+                shipping_costs=shipping_costs
+            ))
+        }
+
+    def export(self, result, filename="optimized_cart.xlsx"):
+        """
+        Exporte les deux scénarios dans un Excel (même format que optimize_cart.py).
+        Seul le nom du fichier est retenu : il est toujours écrit dans EXPORT_DIR.
+        """
+        name = os.path.basename(filename.replace("\\", "/"))
+        if not name or name in (".", ".."):
+            raise ValueError(f"Nom de fichier invalide : {filename}")
+        if not name.endswith(".xlsx"):
+            name += ".xlsx"
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        filename = os.path.join(EXPORT_DIR, name)
+
+        best = result["Full Best Price"]
+        opt = result["Optimisé"]
+        save_to_excel(
+            best["Offres"], best["Vendeurs"], best["Coût cartes"], best["Frais de port"], best["Total"],
+            opt["Offres"], opt["Vendeurs"], opt["Coût cartes"], opt["Frais de port"], opt["Total"],
+            filename=filename
+        )
+        return filename
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+
+class OptimizerRequestHandler(BaseHTTPRequestHandler):
+    service = None  # OptimizerService, renseigné par serve()
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _cards_from_request(self, request):
+        if "cards" in request:
+            return request["cards"]
+        return self.service.scrape(request.get("urls", []), refresh=request.get("refresh", False))
+
+    def _is_local_request(self):
+        """Refuse les requêtes dont l'en-tête Host ne désigne pas la machine locale."""
+        host = self.headers.get("Host", "")
+        if host.startswith("["):
+            hostname = host.split("]")[0] + "]"
+        else:
+            hostname = host.rsplit(":", 1)[0]
+        return hostname in ALLOWED_HOSTS
+
+    def do_GET(self):
+        if not self._is_local_request():
+            self._send_json(403, {"error": "Hôte non autorisé"})
+            return
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "cartes en cache": len(self.service.cards),
+                "vendeurs en cache": len(self.service.seller_cache.profiles)
+            })
+        else:
+            self._send_json(404, {"error": f"Endpoint inconnu : {self.path}"})
+
+    def do_POST(self):
+        if not self._is_local_request():
+            self._send_json(403, {"error": "Hôte non autorisé"})
+            return
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type != "application/json":
+            self._send_json(415, {"error": "Content-Type application/json attendu"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"JSON invalide : {e}"})
+            return
+
+        try:
+            if self.path == "/scrape":
+                cards = self.service.scrape(request.get("urls", []), refresh=request.get("refresh", False))
+                self._send_json(200, {"cards": cards})
+            elif self.path in ("/optimize", "/export"):
+                result = self.service.optimize(
+                    self._cards_from_request(request),
+                    tolerance=request.get("tolerance", 0.10),
+                    shipping_cost_per_vendor=request.get("shipping_cost_per_vendor", 8)
+                )
+                if self.path == "/export":
+                    filename = self.service.export(result, request.get("filename", "optimized_cart.xlsx"))
+                    self._send_json(200, {"filename": filename})
+                else:
+                    self._send_json(200, result)
+            else:
+                self._send_json(404, {"error": f"Endpoint inconnu : {self.path}"})
+        except Exception as e:
+            logging.error(f"Erreur sur {self.path} : {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logging.info(f"{self.address_string()} - {format % args}")
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, pool_size=2):
+    """Lance le démon (bloquant) ; une requête = un thread, l'état reste partagé."""
+    service = OptimizerService(pool_size=pool_size)
+    OptimizerRequestHandler.service = service
+    httpd = ThreadingHTTPServer((host, port), OptimizerRequestHandler)
+    logging.info(f"Démon d'optimisation à l'écoute sur http://{host}:{port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Arrêt du démon.")
+    finally:
+        httpd.server_close()
+        service.close()
+
+class DaemonClient:
+    """Client léger (bibliothèque standard uniquement) pour les front ends, ex: l'app Tk."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=600):
+        self.base_url = f"http://{host}:{port}"
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    def is_running(self):
+        try:
+            return self._request("/health").get("status") == "ok"
+        except OSError:
+            return False
+
+    def scrape(self, urls, refresh=False):
+        return self._request("/scrape", {"urls": urls, "refresh": refresh})["cards"]
+
+    def optimize(self, cards, tolerance=0.10, shipping_cost_per_vendor=8):
+        return self._request("/optimize", {
+            "cards": cards,
+            "tolerance": tolerance,
+            "shipping_cost_per_vendor": shipping_cost_per_vendor
+        })
+
+    def export(self, cards, filename="optimized_cart.xlsx"):
+        return self._request("/export", {"cards": cards, "filename": filename})["filename"]
+
+# Utilisation : python server.py [port]
+if __name__ == "__main__":
+    serve(port=int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT)
@@ -0,0 +1,63 @@
+import pytest
+
+from main import parse_card_page
+from price_parser import parse_price, parse_price_parts
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234,56 €", (1234.56, "EUR")),
+    ("€1,234.56", (1234.56, "EUR")),
+    ("1 234,56 €", (1234.56, "EUR")),
+    ("1 234,56 €", (1234.56, "EUR")),  # espace insécable
+    ("£1,234.56", (1234.56, "GBP")),
+    ("CHF 1'234.50", (1234.5, "CHF")),
+    ("12,5 Fr.", (12.5, "CHF")),
+    ("0,05 €", (0.05, "EUR")),
+    ("12.345.678,90 €", (12345678.9, "EUR")),
+])
+def test_valid_formats(text, expected):
+    assert parse_price_parts(text) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,234 €", 1234.0),  # séparateur suivi de 3 chiffres : milliers, pas décimales
+    ("12,345", 12345.0),
+    ("1.234", 1234.0),
+    ("12.50", 12.5),
+    ("12,5", 12.5),
+])
+def test_separator_rules(text, expected):
+    assert parse_price(text) == expected
+
+@pytest.mark.parametrize("text", [
+    "1.23.4",      # groupe de milliers qui n'a pas 3 chiffres
+    "1.234.56",    # même séparateur pour milliers et décimales
+    "1,234.567",   # 3 décimales
+    "-3,00 €",     # prix négatif
+    "-1.234,56 €",
+    "N/A",
+    "",
+    None,
+])
+def test_invalid_prices(text):
+    assert parse_price_parts(text)[0] is None
+
+def test_parse_price_rejects_other_currency():
+    assert parse_price("£2.50") is None
+    assert parse_price("£2.50", currency="GBP") == 2.5
+
+def _page(*prices):
+    rows = "".join(
+        f'<div class="article-row"><span class="seller-name"><a href="/fr/Users/v{i}">v{i}</a></span>'
+        f'<div class="price-container"><span class="color-primary">{price}</span></div></div>'
+        for i, price in enumerate(prices)
+    )
+    return f'<html><div class="page-title-container"><h1>Pikachu (Base Set)</h1></div>{rows}</html>'
+
+def test_card_page_flags_invalid_and_foreign_offers():
+    card = parse_card_page(_page("1,50 €", "£2.00", "-3,00 €"))
+    assert card["Offres"] == [
+        {"Vendeur": "v0", "Lien vendeur": "https://www.cardmarket.com/fr/Users/v0", "Prix": 1.5, "Devise": "EUR"}
+    ]
+    assert [o["Motif"] for o in card["Offres invalides"]] == [
+        "devise GBP non prise en charge", "prix illisible"
+    ]
+    assert card["Statut"] == "ok"
@@ -0,0 +1,71 @@
+import pytest
+
+from retry_policy import TransientScrapeError
+from seller_profiles import SellerProfileCache, parse_seller_page
+
+NB_CARDS = 300
+NB_SELLERS = 120
+
+def _cards():
+    # 300 cartes de 5 offres chacune, réparties sur 120 vendeurs (chaque vendeur revient souvent)
+    return [
+        {
+            "Nom de la carte": f"Carte {i}",
+            "Extension": "Base Set",
+            "Offres": [
+                {
+                    "Vendeur": f"v{(i * 7 + j) % NB_SELLERS}",
+                    "Lien vendeur": f"https://www.cardmarket.com/fr/Users/v{(i * 7 + j) % NB_SELLERS}",
+                    "Prix": 1.0 + j,
+                    "Devise": "EUR"
+                }
+                for j in range(5)
+            ]
+        }
+        for i in range(NB_CARDS)
+    ]
+
+class StubFetcher:
+    """Remplace le chargement Selenium : compte les pages vendeur demandées."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, seller_url):
+        self.calls.append(seller_url)
+        return {"Pays": "France", "Frais de port": {"Lettre": 1.5, "Lettre suivie": 4.5}}
+
+def test_one_lookup_per_seller_then_none_when_warm(tmp_path):
+    filename = str(tmp_path / "seller_profiles.json")
+    cards = _cards()
+
+    fetcher = StubFetcher()
+    cold = SellerProfileCache(filename=filename, fetcher=fetcher)
+    costs = cold.shipping_costs(cards)
+    assert cold.lookups == len(fetcher.calls) == NB_SELLERS
+    assert len(set(fetcher.calls)) == NB_SELLERS
+    assert len(costs) == NB_SELLERS
+
+    # Lancement "à chaud" : le cache relu depuis le disque suffit
+    fetcher = StubFetcher()
+    warm = SellerProfileCache(filename=filename, fetcher=fetcher)
+    assert warm.shipping_costs(cards) == costs
+    assert warm.lookups == 0 and fetcher.calls == []
+
+def test_failed_lookup_is_cached_negatively(tmp_path):
+    def failing_fetcher(seller_url):
+        raise TransientScrapeError("Challenge anti-bot, page vendeur non servie")
+
+    cache = SellerProfileCache(filename=str(tmp_path / "seller_profiles.json"), fetcher=failing_fetcher)
+    cards = _cards()[:1]
+    assert cache.shipping_costs(cards) == {}
+    assert cache.shipping_costs(cards) == {}
+    assert cache.lookups == 5  # un essai par vendeur, pas de nouvel essai avant FAILURE_TTL
+
+@pytest.mark.parametrize("html", [
+    "<html><title>Just a moment</title><div id='cf-challenge'></div></html>",
+    "<html><div class='page-title-container'><h1>v0</h1></div></html>",
+])
+def test_seller_page_without_shipping_block_is_transient(html):
+    with pytest.raises(TransientScrapeError):
+        parse_seller_page(html)